@@ -4,19 +4,35 @@ Sends daily email reports with GitHub activities and motivational quotes.
 Enhanced with Nepali timezone and cultural context.
 """
 
+import functools
+import hashlib
+import itertools
+import json
 import os
+import re
 import smtplib
 import ssl
+from concurrent.futures import ThreadPoolExecutor
+from email.utils import formatdate
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
+from zoneinfo import ZoneInfo
 from github import Github
+from github.Repository import Repository
+import requests
 import sys
-import pytz
 import random
 
+# GitHub API endpoints
+GITHUB_API_URL = "https://api.github.com"
+GITHUB_GRAPHQL_URL = "https://api.github.com/graphql"
+
+# On-disk cache for conditional (ETag) API requests
+CACHE_DIR = os.path.expanduser('~/.cache/commit_reminder')
+
 # Nepali timezone
-NEPAL_TZ = pytz.timezone('Asia/Kathmandu')
+NEPAL_TZ = ZoneInfo('Asia/Kathmandu')
 
 # Nepali holidays
 NEPALI_HOLIDAYS = {
@@ -66,22 +82,318 @@ AUTOMATED_COMMIT_PATTERNS = [
     'update dependencies', 'auto-generated', 'ci:', '[bot]', 'workflow:'
 ]
 
+# Single compiled matcher - one pass over the message instead of one
+# substring scan per pattern
+_AUTOMATED_COMMIT_RE = re.compile(
+    '|'.join(re.escape(p) for p in AUTOMATED_COMMIT_PATTERNS), re.IGNORECASE)
+
+# Optional: pyahocorasick matches in O(len(message)) regardless of how
+# many patterns are configured - worthwhile for large custom pattern lists
+try:
+    import ahocorasick
+    _AUTOMATED_COMMIT_AUTOMATON = ahocorasick.Automaton()
+    for _pattern in AUTOMATED_COMMIT_PATTERNS:
+        _AUTOMATED_COMMIT_AUTOMATON.add_word(_pattern.lower(), _pattern)
+    _AUTOMATED_COMMIT_AUTOMATON.make_automaton()
+except ImportError:
+    _AUTOMATED_COMMIT_AUTOMATON = None
+
 def is_automated_commit(commit_message):
     """Check if a commit message indicates an automated commit."""
-    message_lower = commit_message.lower().strip()
-    return any(pattern.lower() in message_lower for pattern in AUTOMATED_COMMIT_PATTERNS)
+    if _AUTOMATED_COMMIT_AUTOMATON is not None:
+        return next(_AUTOMATED_COMMIT_AUTOMATON.iter(commit_message.lower()), None) is not None
+    return _AUTOMATED_COMMIT_RE.search(commit_message) is not None
+
+# Frozen key set for the membership test, plus a memoized lookup so
+# repeated checks for the same day skip the dict access entirely
+_HOLIDAY_KEYS = frozenset(NEPALI_HOLIDAYS)
+
+@functools.lru_cache(maxsize=366)
+def _holiday_for(month, day):
+    """Return the holiday name for a (month, day), or None."""
+    return NEPALI_HOLIDAYS.get((month, day))
 
 def is_nepali_holiday(date):
     """Check if the given date is a Nepali holiday."""
     nepal_date = date.astimezone(NEPAL_TZ)
     holiday_key = (nepal_date.month, nepal_date.day)
-    return holiday_key in NEPALI_HOLIDAYS, NEPALI_HOLIDAYS.get(holiday_key)
+    return holiday_key in _HOLIDAY_KEYS, _holiday_for(nepal_date.month, nepal_date.day)
 
 def is_weekend_in_nepal(date):
     """Check if the given date is a weekend in Nepal (Saturday)."""
     nepal_date = date.astimezone(NEPAL_TZ)
     return nepal_date.weekday() == 5
 
+def _cache_path(name):
+    """Return the cache file path for a given cache key."""
+    return os.path.join(CACHE_DIR, f"{name}.json")
+
+def _read_cache(name):
+    """Load a cached entry, or None if missing or unreadable."""
+    try:
+        with open(_cache_path(name)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def _write_cache(name, entry):
+    """Write a cache entry atomically (temp file + rename)."""
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    tmp_path = _cache_path(name) + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(entry, f)
+    os.replace(tmp_path, _cache_path(name))
+
+def fetch_user_repos_cached(token, username):
+    """Fetch the user's repository list with an ETag conditional request.
+
+    The repo list rarely changes day to day; a 304 response costs no
+    rate-limit point and we serve the list from the disk cache instead.
+    """
+    cache_key = 'repos-' + hashlib.sha1(username.encode()).hexdigest()[:12]
+    cached = _read_cache(cache_key)
+
+    headers = {'Authorization': f'token {token}'}
+    if cached and cached.get('etag'):
+        headers['If-None-Match'] = cached['etag']
+
+    url = f"{GITHUB_API_URL}/user/repos"
+    params = {'per_page': 100, 'sort': 'pushed', 'direction': 'desc',
+              'affiliation': 'owner,collaborator'}
+    response = requests.get(url, headers=headers, params=params, timeout=30)
+
+    if response.status_code == 304:
+        return cached['repos']
+    response.raise_for_status()
+
+    etag = response.headers.get('ETag')
+    repos = response.json()
+
+    # Follow pagination for users with more than one page of repos
+    while 'next' in response.links:
+        response = requests.get(response.links['next']['url'],
+                                headers={'Authorization': f'token {token}'},
+                                timeout=30)
+        response.raise_for_status()
+        repos.extend(response.json())
+
+    _write_cache(cache_key, {'etag': etag, 'repos': repos})
+    return repos
+
+def fetch_repo_commits_conditional(token, repo_full_name, username, since_utc, until_utc):
+    """List a repository's commits for the window with a conditional GET.
+
+    If-Modified-Since is set to the window start, so a repository whose
+    last commit predates the window answers 304 - no rate-limit point
+    spent and no JSON to deserialize.
+    """
+    headers = {
+        'Authorization': f'token {token}',
+        'If-Modified-Since': formatdate(since_utc.timestamp(), usegmt=True)
+    }
+    params = {
+        'author': username,
+        'since': since_utc.strftime('%Y-%m-%dT%H:%M:%SZ'),
+        'until': until_utc.strftime('%Y-%m-%dT%H:%M:%SZ'),
+        'per_page': 100
+    }
+    response = requests.get(f"{GITHUB_API_URL}/repos/{repo_full_name}/commits",
+                            headers=headers, params=params, timeout=30)
+
+    if response.status_code == 304:
+        return []
+    response.raise_for_status()
+    commits = response.json()
+
+    while 'next' in response.links:
+        response = requests.get(response.links['next']['url'],
+                                headers={'Authorization': f'token {token}'},
+                                timeout=30)
+        response.raise_for_status()
+        commits.extend(response.json())
+
+    return commits
+
+def _graphql_request(token, query, variables):
+    """Run a single GraphQL query against the GitHub API and return its data."""
+    response = requests.post(
+        GITHUB_GRAPHQL_URL,
+        json={'query': query, 'variables': variables},
+        headers={'Authorization': f'bearer {token}'},
+        timeout=30
+    )
+    response.raise_for_status()
+    payload = response.json()
+    if payload.get('errors'):
+        raise RuntimeError(payload['errors'][0].get('message', 'GraphQL error'))
+    return payload['data']
+
+def fetch_commits_graphql(token, username, since_utc, until_utc):
+    """Fetch yesterday's commits across all repositories in one GraphQL query.
+
+    Returns a dict mapping repo name to a list of commit dicts. A single
+    query (plus pagination for >100 repos) replaces the per-repo REST
+    calls, collapsing N+1 round-trips into one.
+    """
+    user_id = _graphql_request(
+        token,
+        "query($login: String!) { user(login: $login) { id } }",
+        {'login': username}
+    )['user']['id']
+
+    query = """
+    query($login: String!, $userId: ID!, $since: GitTimestamp!, $until: GitTimestamp!, $cursor: String) {
+      user(login: $login) {
+        repositories(first: 100, affiliations: [OWNER, COLLABORATOR],
+                     orderBy: {field: PUSHED_AT, direction: DESC}, after: $cursor) {
+          pageInfo { endCursor hasNextPage }
+          nodes {
+            name
+            defaultBranchRef {
+              target {
+                ... on Commit {
+                  history(since: $since, until: $until, author: {id: $userId}) {
+                    nodes { oid messageHeadline url }
+                  }
+                }
+              }
+            }
+          }
+        }
+      }
+    }
+    """
+
+    commits_by_repo = {}
+    cursor = None
+    while True:
+        data = _graphql_request(token, query, {
+            'login': username,
+            'userId': user_id,
+            'since': since_utc.strftime('%Y-%m-%dT%H:%M:%SZ'),
+            'until': until_utc.strftime('%Y-%m-%dT%H:%M:%SZ'),
+            'cursor': cursor
+        })
+        repositories = data['user']['repositories']
+
+        for node in repositories['nodes']:
+            branch_ref = node.get('defaultBranchRef')
+            if not branch_ref or not branch_ref.get('target'):
+                continue
+            history = branch_ref['target'].get('history', {}).get('nodes', [])
+            if history:
+                commits_by_repo[node['name']] = [
+                    {
+                        'message': commit['messageHeadline'],
+                        'sha': commit['oid'][:8],
+                        'url': commit['url']
+                    }
+                    for commit in history
+                ]
+
+        if not repositories['pageInfo']['hasNextPage']:
+            break
+        cursor = repositories['pageInfo']['endCursor']
+
+    return commits_by_repo
+
+def fetch_commits_rest(github_client, token, username, since_utc, until_utc):
+    """Fetch yesterday's commits by scanning repositories over the REST API.
+
+    Fallback for tokens without GraphQL access. Returns the same
+    repo-name -> commit-list mapping as fetch_commits_graphql.
+    """
+    # Get user's repositories (served from the ETag cache on unchanged days)
+    raw_repos = fetch_user_repos_cached(token, username)
+    repos = [github_client.create_from_raw_data(Repository, raw) for raw in raw_repos]
+
+    # Repos arrive in push-time order, so everything from the first repo
+    # last pushed before the window onwards cannot match
+    active_repos = list(itertools.takewhile(
+        lambda r: r.pushed_at is None or r.pushed_at >= since_utc, repos))
+
+    def _scan_repo(repo):
+        try:
+            repo_commits = []
+
+            # Get commits from yesterday (304 short-circuit for repos
+            # whose last commit predates the window)
+            commits = fetch_repo_commits_conditional(
+                token, repo.full_name, username, since_utc, until_utc)
+
+            for commit in commits:
+                commit_message = commit['commit']['message'].split('\n')[0]  # First line only
+                repo_commits.append({
+                    'message': commit_message,
+                    'sha': commit['sha'][:8],
+                    'url': commit['html_url']
+                })
+
+            if repo_commits:
+                return repo.name, repo_commits
+            return None
+
+        except Exception as e:
+            print(f"Error processing repo {repo.name}: {e}")
+            return None
+
+    # Each scan is independent network I/O - overlap the round-trips
+    commits_by_repo = {}
+    with ThreadPoolExecutor(max_workers=10) as executor:
+        for result in executor.map(_scan_repo, active_repos):
+            if result is not None:
+                name, repo_commits = result
+                commits_by_repo[name] = repo_commits
+
+    return commits_by_repo
+
+def fetch_activity_from_events(github_client, username, since_utc, until_utc):
+    """Collect yesterday's commits, PRs and issues from the events feed.
+
+    /users/{user}/events returns recent public activity across all repos
+    in one paginated request, replacing the per-repo scan and the search
+    query. Events arrive newest first, so iteration stops at the first
+    one older than the window. Private activity is not included.
+    """
+    commits_by_repo = {}
+    pull_requests = []
+    issues = []
+
+    for event in github_client.get_user(username).get_events():
+        if event.created_at < since_utc:
+            break
+        if event.created_at > until_utc:
+            continue
+
+        payload = event.payload
+        repo_name = event.repo.name.split('/')[-1]
+
+        if event.type == 'PushEvent':
+            for commit in payload.get('commits', []):
+                commits_by_repo.setdefault(repo_name, []).append({
+                    'message': commit['message'].split('\n')[0],
+                    'sha': commit['sha'][:8],
+                    'url': f"https://github.com/{event.repo.name}/commit/{commit['sha']}"
+                })
+        elif event.type == 'PullRequestEvent' and payload.get('action') == 'opened':
+            pr = payload['pull_request']
+            pull_requests.append({
+                'title': pr['title'],
+                'repo': repo_name,
+                'url': pr['html_url'],
+                'state': pr['state']
+            })
+        elif event.type == 'IssuesEvent' and payload.get('action') == 'opened':
+            issue = payload['issue']
+            issues.append({
+                'title': issue['title'],
+                'repo': repo_name,
+                'url': issue['html_url'],
+                'state': issue['state']
+            })
+
+    return commits_by_repo, pull_requests, issues
+
 def get_user_activity_yesterday(github_client, username):
     """Get comprehensive user activity from yesterday."""
     # Calculate yesterday in Nepal time
@@ -90,13 +402,14 @@ def get_user_activity_yesterday(github_client, username):
     yesterday_end = yesterday_start.replace(hour=23, minute=59, second=59)
     
     # Convert to UTC for GitHub API
-    yesterday_start_utc = yesterday_start.astimezone(pytz.UTC)
-    yesterday_end_utc = yesterday_end.astimezone(pytz.UTC)
+    yesterday_start_utc = yesterday_start.astimezone(timezone.utc)
+    yesterday_end_utc = yesterday_end.astimezone(timezone.utc)
+    date_str = yesterday_start.strftime('%Y-%m-%d')
     
-    print(f"Checking activity for: {yesterday_start.strftime('%Y-%m-%d')} (Nepal time)")
+    print(f"Checking activity for: {date_str} (Nepal time)")
     
     activity_summary = {
-        'date': yesterday_start.strftime('%Y-%m-%d'),
+        'date': date_str,
         'commits': {},
         'pull_requests': [],
         'issues': [],
@@ -109,138 +422,116 @@ def get_user_activity_yesterday(github_client, username):
     }
     
     try:
-        user = github_client.get_user(username)
-        
-        # Get user's repositories
-        repos = user.get_repos(type='all', sort='updated')
-        
-        for repo in repos:
+        token = os.environ.get('GITHUB_TOKEN')
+        commits_by_repo = None
+        pull_requests = []
+        issues = []
+
+        # The events feed covers public commits, PRs and issues in one
+        # request; opt into the full pipeline for private activity
+        if not os.environ.get('INCLUDE_PRIVATE_REPOS'):
             try:
-                # Skip if user is not owner or collaborator
-                if not (repo.owner.login == username or repo.get_collaborator_permission(username) in ['admin', 'write']):
-                    continue
-                
-                repo_commits = []
-                
-                # Get commits from yesterday
-                commits = repo.get_commits(
-                    author=username,
-                    since=yesterday_start_utc,
-                    until=yesterday_end_utc
-                )
-                
-                for commit in commits:
-                    commit_message = commit.commit.message.split('\n')[0]  # First line only
-                    
-                    # Skip automated commits
-                    if is_automated_commit(commit_message):
-                        continue
-                    
-                    repo_commits.append({
-                        'message': commit_message,
-                        'sha': commit.sha[:8],
-                        'url': commit.html_url
-                    })
-                    activity_summary['total_commits'] += 1
-                    activity_summary['repositories_touched'].add(repo.name)
-                
-                if repo_commits:
-                    activity_summary['commits'][repo.name] = repo_commits
-                
+                commits_by_repo, pull_requests, issues = fetch_activity_from_events(
+                    github_client, username, yesterday_start_utc, yesterday_end_utc)
             except Exception as e:
-                print(f"Error processing repo {repo.name}: {e}")
-                continue
-        
-        # Get pull requests created yesterday
-        search_query = f"author:{username} type:pr created:{yesterday_start.strftime('%Y-%m-%d')}"
-        prs = github_client.search_issues(query=search_query)
-        
-        for pr in prs:
-            activity_summary['pull_requests'].append({
-                'title': pr.title,
-                'repo': pr.repository.name,
-                'url': pr.html_url,
-                'state': pr.state
-            })
+                print(f"Events feed failed ({e}), falling back to full scan")
+                commits_by_repo = None
+
+        if commits_by_repo is None:
+            # Get commits from yesterday - one GraphQL query instead of
+            # a REST call per repository
+            try:
+                commits_by_repo = fetch_commits_graphql(
+                    token, username, yesterday_start_utc, yesterday_end_utc)
+            except Exception as e:
+                print(f"GraphQL query failed ({e}), falling back to REST scan")
+                commits_by_repo = fetch_commits_rest(
+                    github_client, token, username, yesterday_start_utc, yesterday_end_utc)
+
+            # Get pull requests and issues created yesterday in one
+            # search call - the search API allows only 30 requests/min
+            search_query = f"author:{username} created:{date_str}"
+            pull_requests = []
+            issues = []
+            for item in github_client.search_issues(query=search_query):
+                entry = {
+                    'title': item.title,
+                    'repo': item.repository.name,
+                    'url': item.html_url,
+                    'state': item.state
+                }
+                if item.raw_data.get('pull_request') is not None:
+                    pull_requests.append(entry)
+                else:
+                    issues.append(entry)
+
+        for repo_name, repo_commits in commits_by_repo.items():
+            # Skip automated commits
+            kept = [c for c in repo_commits if not is_automated_commit(c['message'])]
+            if kept:
+                activity_summary['commits'][repo_name] = kept
+                activity_summary['total_commits'] += len(kept)
+                activity_summary['repositories_touched'].add(repo_name)
+
+        for entry in pull_requests:
+            activity_summary['pull_requests'].append(entry)
             activity_summary['total_prs'] += 1
-            activity_summary['repositories_touched'].add(pr.repository.name)
-        
-        # Get issues created yesterday
-        search_query = f"author:{username} type:issue created:{yesterday_start.strftime('%Y-%m-%d')}"
-        issues = github_client.search_issues(query=search_query)
-        
-        for issue in issues:
-            activity_summary['issues'].append({
-                'title': issue.title,
-                'repo': issue.repository.name,
-                'url': issue.html_url,
-                'state': issue.state
-            })
+            activity_summary['repositories_touched'].add(entry['repo'])
+
+        for entry in issues:
+            activity_summary['issues'].append(entry)
             activity_summary['total_issues'] += 1
-            activity_summary['repositories_touched'].add(issue.repository.name)
-        
+            activity_summary['repositories_touched'].add(entry['repo'])
+
     except Exception as e:
         print(f"Error getting user activity: {e}")
     
     activity_summary['repositories_touched'] = len(activity_summary['repositories_touched'])
     return activity_summary
 
-def generate_html_email(activity_summary, user_email):
-    """Generate HTML email content based on activity."""
-    now_nepal = datetime.now(NEPAL_TZ)
-    nepal_time = now_nepal.strftime('%Y-%m-%d %H:%M %Z')
-    
-    has_activity = (activity_summary['total_commits'] > 0 or 
-                   activity_summary['total_prs'] > 0 or 
-                   activity_summary['total_issues'] > 0)
-    
-    if has_activity:
-        subject = f"🎉 Your GitHub Activity Summary - {activity_summary['date']}"
-        
-        # Build commits section
-        commits_html = ""
-        for repo_name, commits in activity_summary['commits'].items():
-            commits_html += f"""
-            <div style="margin-bottom: 20px; padding: 15px; background-color: #f8f9fa; border-radius: 8px;">
-                <h3 style="color: #0366d6; margin: 0 0 10px 0;">📂 {repo_name}</h3>
-                <ul style="margin: 0; padding-left: 20px;">
-            """
-            for commit in commits:
-                commits_html += f"""
+# Jinja2 templates compile to Python bytecode once at import; without
+# jinja2 installed we fall back to the inline string building below
+try:
+    import jinja2
+    _JINJA_ENV = jinja2.Environment(
+        loader=jinja2.FileSystemLoader(
+            os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'templates')),
+        autoescape=True,
+        auto_reload=False
+    )
+    _ACTIVITY_TEMPLATE = _JINJA_ENV.get_template('activity.html')
+    _MOTIVATION_TEMPLATE = _JINJA_ENV.get_template('motivation.html')
+except ImportError:
+    _JINJA_ENV = None
+
+# Per-item HTML fragments for generate_html_email, formatted with the
+# commit/PR/issue dicts built by get_user_activity_yesterday
+_COMMIT_LI = """
                     <li style="margin-bottom: 8px;">
-                        <strong>{commit['sha']}</strong>: {commit['message']}
-                        <br><a href="{commit['url']}" style="color: #0366d6; font-size: 12px;">View commit</a>
+                        <strong>{sha}</strong>: {message}
+                        <br><a href="{url}" style="color: #0366d6; font-size: 12px;">View commit</a>
                     </li>
                 """
-            commits_html += "</ul></div>"
-        
-        # Build PRs section
-        prs_html = ""
-        if activity_summary['pull_requests']:
-            prs_html = """<h2 style="color: #28a745;">📋 Pull Requests</h2>"""
-            for pr in activity_summary['pull_requests']:
-                prs_html += f"""
+
+_PR_DIV = """
                 <div style="margin-bottom: 10px; padding: 10px; background-color: #f0f8e8; border-radius: 5px;">
-                    <strong>{pr['repo']}</strong>: {pr['title']} 
-                    <span style="background-color: #28a745; color: white; padding: 2px 6px; border-radius: 3px; font-size: 11px;">{pr['state']}</span>
-                    <br><a href="{pr['url']}" style="color: #28a745;">View PR</a>
+                    <strong>{repo}</strong>: {title}
+                    <span style="background-color: #28a745; color: white; padding: 2px 6px; border-radius: 3px; font-size: 11px;">{state}</span>
+                    <br><a href="{url}" style="color: #28a745;">View PR</a>
                 </div>
                 """
-        
-        # Build issues section
-        issues_html = ""
-        if activity_summary['issues']:
-            issues_html = """<h2 style="color: #d73a49;">🐛 Issues</h2>"""
-            for issue in activity_summary['issues']:
-                issues_html += f"""
+
+_ISSUE_DIV = """
                 <div style="margin-bottom: 10px; padding: 10px; background-color: #ffeef0; border-radius: 5px;">
-                    <strong>{issue['repo']}</strong>: {issue['title']}
-                    <span style="background-color: #d73a49; color: white; padding: 2px 6px; border-radius: 3px; font-size: 11px;">{issue['state']}</span>
-                    <br><a href="{issue['url']}" style="color: #d73a49;">View Issue</a>
+                    <strong>{repo}</strong>: {title}
+                    <span style="background-color: #d73a49; color: white; padding: 2px 6px; border-radius: 3px; font-size: 11px;">{state}</span>
+                    <br><a href="{url}" style="color: #d73a49;">View Issue</a>
                 </div>
                 """
-        
-        html_content = f"""
+
+# Full-page fallback templates, interned once at import instead of being
+# rebuilt as f-string literals on every call
+_ACTIVITY_PAGE = """
         <html>
         <head>
             <meta charset="utf-8">
@@ -249,39 +540,39 @@ def generate_html_email(activity_summary, user_email):
             <div style="max-width: 600px; margin: 0 auto; padding: 20px;">
                 <div style="text-align: center; background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); color: white; padding: 30px; border-radius: 10px; margin-bottom: 20px;">
                     <h1 style="margin: 0;">🚀 Daily GitHub Report</h1>
-                    <p style="margin: 10px 0 0 0; opacity: 0.9;">Namaste! Here's your activity from {activity_summary['date']}</p>
+                    <p style="margin: 10px 0 0 0; opacity: 0.9;">Namaste! Here's your activity from {date}</p>
                 </div>
-                
+
                 <div style="background-color: #e8f5e8; padding: 20px; border-radius: 10px; margin-bottom: 20px;">
                     <h2 style="color: #28a745; margin-top: 0;">📊 Quick Stats</h2>
                     <div style="display: flex; justify-content: space-around; text-align: center;">
                         <div>
-                            <div style="font-size: 24px; font-weight: bold; color: #0366d6;">{activity_summary['total_commits']}</div>
+                            <div style="font-size: 24px; font-weight: bold; color: #0366d6;">{total_commits}</div>
                             <div style="font-size: 14px;">Commits</div>
                         </div>
                         <div>
-                            <div style="font-size: 24px; font-weight: bold; color: #28a745;">{activity_summary['total_prs']}</div>
+                            <div style="font-size: 24px; font-weight: bold; color: #28a745;">{total_prs}</div>
                             <div style="font-size: 14px;">Pull Requests</div>
                         </div>
                         <div>
-                            <div style="font-size: 24px; font-weight: bold; color: #d73a49;">{activity_summary['total_issues']}</div>
+                            <div style="font-size: 24px; font-weight: bold; color: #d73a49;">{total_issues}</div>
                             <div style="font-size: 14px;">Issues</div>
                         </div>
                         <div>
-                            <div style="font-size: 24px; font-weight: bold; color: #6f42c1;">{activity_summary['repositories_touched']}</div>
+                            <div style="font-size: 24px; font-weight: bold; color: #6f42c1;">{repositories_touched}</div>
                             <div style="font-size: 14px;">Repositories</div>
                         </div>
                     </div>
                 </div>
-                
-                {f'<h2 style="color: #0366d6;">💻 Commits</h2>{commits_html}' if activity_summary['commits'] else ''}
-                {prs_html}
-                {issues_html}
-                
+
+                {commits_section}
+                {prs_section}
+                {issues_section}
+
                 <div style="background-color: #fff3cd; border: 1px solid #ffeaa7; padding: 15px; border-radius: 5px; margin-top: 20px;">
                     <p style="margin: 0; color: #856404;"><strong>🇳🇵 Nepal Time:</strong> {nepal_time}</p>
                 </div>
-                
+
                 <div style="text-align: center; margin-top: 30px; padding-top: 20px; border-top: 1px solid #eee; color: #666;">
                     <p>Keep up the great work! 🎉</p>
                     <small>Generated by your Daily GitHub Activity Reporter</small>
@@ -290,12 +581,8 @@ def generate_html_email(activity_summary, user_email):
         </body>
         </html>
         """
-    else:
-        # No activity - send motivational email
-        quote = random.choice(MOTIVATIONAL_QUOTES)
-        subject = f"💪 Daily Motivation - {activity_summary['date']}"
-        
-        html_content = f"""
+
+_MOTIVATION_PAGE = """
         <html>
         <head>
             <meta charset="utf-8">
@@ -306,18 +593,18 @@ def generate_html_email(activity_summary, user_email):
                     <h1 style="margin: 0; font-size: 28px;">🌟 Daily Inspiration</h1>
                     <p style="margin: 15px 0 0 0; opacity: 0.9;">Namaste! Let's make today count 🙏</p>
                 </div>
-                
+
                 <div style="background: linear-gradient(135deg, #ffecd2 0%, #fcb69f 100%); padding: 30px; border-radius: 15px; text-align: center; margin-bottom: 30px;">
                     <h2 style="color: #d63384; margin: 0 0 20px 0;">💡 Quote of the Day</h2>
                     <blockquote style="font-size: 18px; font-style: italic; color: #6c5ce7; margin: 0; padding: 0; border: none; line-height: 1.8;">
                         "{quote}"
                     </blockquote>
                 </div>
-                
+
                 <div style="background-color: #e8f4fd; padding: 25px; border-radius: 10px; margin-bottom: 20px;">
                     <h2 style="color: #0984e3; margin-top: 0;">🚀 No Activity Yesterday?</h2>
                     <p>That's okay! Every developer has quiet days. Here are some ideas to get your creative juices flowing:</p>
-                    
+
                     <div style="display: grid; gap: 15px;">
                         <div style="background: white; padding: 15px; border-radius: 8px; border-left: 4px solid #00b894;">
                             <strong>🐛 Quick Wins:</strong> Fix a small bug, update documentation, or clean up some code
@@ -333,11 +620,11 @@ def generate_html_email(activity_summary, user_email):
                         </div>
                     </div>
                 </div>
-                
+
                 <div style="background-color: #fff3cd; border: 1px solid #ffeaa7; padding: 15px; border-radius: 5px; margin-bottom: 20px;">
                     <p style="margin: 0; color: #856404;"><strong>🇳🇵 Nepal Time:</strong> {nepal_time}</p>
                 </div>
-                
+
                 <div style="text-align: center; margin-top: 30px; padding-top: 20px; border-top: 1px solid #eee;">
                     <p style="color: #00b894; font-weight: bold; font-size: 18px;">You've got this! 💪</p>
                     <p style="color: #666; margin: 0;">Remember: Progress over perfection, consistency over intensity!</p>
@@ -347,47 +634,167 @@ def generate_html_email(activity_summary, user_email):
         </body>
         </html>
         """
+
+# One module-level generator instead of reseeding per pick
+_RNG = random.Random()
+
+def pick_motivational_quote():
+    """Pick the next quote from a shuffled rotation persisted on disk.
+
+    Walking a shuffled order guarantees every quote appears before any
+    repeats; the position survives across daily runs via the cache dir.
+    """
+    state = _read_cache('quote_state') or {}
+    order = state.get('order')
+    index = state.get('index', 0)
+
+    if not order or len(order) != len(MOTIVATIONAL_QUOTES) or index >= len(order):
+        order = _RNG.sample(range(len(MOTIVATIONAL_QUOTES)), len(MOTIVATIONAL_QUOTES))
+        index = 0
+
+    try:
+        _write_cache('quote_state', {'order': order, 'index': index + 1})
+    except OSError:
+        pass
+
+    return MOTIVATIONAL_QUOTES[order[index]]
+
+def generate_html_email(activity_summary, user_email):
+    """Generate HTML email content based on activity."""
+    now_nepal = datetime.now(NEPAL_TZ)
+    nepal_time = now_nepal.strftime('%Y-%m-%d %H:%M %Z')
     
-    return subject, html_content
+    has_activity = (activity_summary['total_commits'] > 0 or 
+                   activity_summary['total_prs'] > 0 or 
+                   activity_summary['total_issues'] > 0)
+    
+    if has_activity:
+        subject = f"🎉 Your GitHub Activity Summary - {activity_summary['date']}"
 
-def send_email(user_email, subject, html_content):
-    """Send HTML email using Gmail SMTP."""
+        if _JINJA_ENV is not None:
+            return subject, _ACTIVITY_TEMPLATE.render(
+                summary=activity_summary, nepal_time=nepal_time)
+
+        # Build each section as a list of fragments and join once -
+        # repeated += on strings copies the whole buffer every time
+        commit_parts = []
+        for repo_name, commits in activity_summary['commits'].items():
+            commit_parts.append(f"""
+            <div style="margin-bottom: 20px; padding: 15px; background-color: #f8f9fa; border-radius: 8px;">
+                <h3 style="color: #0366d6; margin: 0 0 10px 0;">📂 {repo_name}</h3>
+                <ul style="margin: 0; padding-left: 20px;">
+            """)
+            commit_parts.extend(_COMMIT_LI.format_map(commit) for commit in commits)
+            commit_parts.append("</ul></div>")
+        commits_html = ''.join(commit_parts)
+
+        # Build PRs section
+        prs_html = ""
+        if activity_summary['pull_requests']:
+            pr_parts = ["""<h2 style="color: #28a745;">📋 Pull Requests</h2>"""]
+            pr_parts.extend(_PR_DIV.format_map(pr) for pr in activity_summary['pull_requests'])
+            prs_html = ''.join(pr_parts)
+
+        # Build issues section
+        issues_html = ""
+        if activity_summary['issues']:
+            issue_parts = ["""<h2 style="color: #d73a49;">🐛 Issues</h2>"""]
+            issue_parts.extend(_ISSUE_DIV.format_map(issue) for issue in activity_summary['issues'])
+            issues_html = ''.join(issue_parts)
+        
+        commits_section = ""
+        if activity_summary['commits']:
+            commits_section = f'<h2 style="color: #0366d6;">💻 Commits</h2>{commits_html}'
+
+        html_content = _ACTIVITY_PAGE.format(
+            date=activity_summary['date'],
+            total_commits=activity_summary['total_commits'],
+            total_prs=activity_summary['total_prs'],
+            total_issues=activity_summary['total_issues'],
+            repositories_touched=activity_summary['repositories_touched'],
+            commits_section=commits_section,
+            prs_section=prs_html,
+            issues_section=issues_html,
+            nepal_time=nepal_time
+        )
+    else:
+        # No activity - send motivational email
+        quote = pick_motivational_quote()
+        subject = f"💪 Daily Motivation - {activity_summary['date']}"
+
+        if _JINJA_ENV is not None:
+            return subject, _MOTIVATION_TEMPLATE.render(
+                quote=quote, nepal_time=nepal_time)
+
+        html_content = _MOTIVATION_PAGE.format(quote=quote, nepal_time=nepal_time)
     
+    return subject, html_content
+
+# SMTP configuration
+SMTP_SERVER = "smtp.gmail.com"
+SMTP_PORT = 587
+
+# Lazily opened SMTP session, reused across send_emails calls so TLS and
+# AUTH are paid once per run rather than once per message
+_smtp_connection = None
+
+def _get_smtp_connection(sender_email, sender_password):
+    """Return an authenticated SMTP session, reconnecting if it dropped."""
+    global _smtp_connection
+
+    if _smtp_connection is not None:
+        try:
+            status, _ = _smtp_connection.noop()
+            if status == 250:
+                return _smtp_connection
+        except (smtplib.SMTPException, OSError):
+            pass
+        _smtp_connection = None
+
+    server = smtplib.SMTP(SMTP_SERVER, SMTP_PORT)
+    server.starttls(context=ssl.create_default_context())
+    server.login(sender_email, sender_password)
+    _smtp_connection = server
+    return server
+
+def send_emails(messages):
+    """Send a batch of (recipient, subject, html) emails over one SMTP session."""
+
     # Email configuration from environment variables
-    smtp_server = "smtp.gmail.com"
-    smtp_port = 587
     sender_email = os.environ.get('SENDER_EMAIL')
     sender_password = os.environ.get('SENDER_APP_PASSWORD')  # Gmail App Password
-    
+
     if not all([sender_email, sender_password]):
         print("Error: Missing email configuration (SENDER_EMAIL, SENDER_APP_PASSWORD)")
         return False
-    
+
     try:
-        # Create message
-        message = MIMEMultipart("alternative")
-        message["Subject"] = subject
-        message["From"] = sender_email
-        message["To"] = user_email
-        
-        # Add HTML content
-        html_part = MIMEText(html_content, "html")
-        message.attach(html_part)
-        
-        # Send email
-        context = ssl.create_default_context()
-        with smtplib.SMTP(smtp_server, smtp_port) as server:
-            server.starttls(context=context)
-            server.login(sender_email, sender_password)
+        server = _get_smtp_connection(sender_email, sender_password)
+
+        for recipient, subject, html_content in messages:
+            # Create message
+            message = MIMEMultipart("alternative")
+            message["Subject"] = subject
+            message["From"] = sender_email
+            message["To"] = recipient
+
+            # Add HTML content
+            html_part = MIMEText(html_content, "html")
+            message.attach(html_part)
+
             server.send_message(message)
-        
-        print(f"✅ Email sent successfully to {user_email}")
+            print(f"✅ Email sent successfully to {recipient}")
+
         return True
-        
+
     except Exception as e:
         print(f"❌ Error sending email: {e}")
         return False
 
+def send_email(user_email, subject, html_content):
+    """Send a single HTML email using Gmail SMTP."""
+    return send_emails([(user_email, subject, html_content)])
+
 def main():
     # Get environment variables
     github_token = os.environ.get('GITHUB_TOKEN')
@@ -411,8 +818,9 @@ def main():
         print(f"Today is {holiday_name} (Nepali holiday), skipping email...")
         return
     
-    # Initialize GitHub client
-    github_client = Github(github_token)
+    # Initialize GitHub client - 100 items per page (default 30) means
+    # a third of the paging requests against the rate limit
+    github_client = Github(github_token, per_page=100)
     
     print(f"📧 Generating daily report for {github_username}...")
     print(f"🇳🇵 Nepal time: {now_nepal.strftime('%Y-%m-%d %H:%M:%S %Z')}")